@@ -1,14 +1,32 @@
 import json
+import math
 import os
-from datetime import datetime
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
+from operator import itemgetter
 from flask import (
     Flask, render_template, request, redirect,
     url_for, session, flash
 )
 from werkzeug.security import generate_password_hash, check_password_hash
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the stdlib json module
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional; data.json is then loaded whole
+    ijson = None
+
 app = Flask(__name__)
 app.secret_key = "super-secret-change-this"
+# logged-in sessions survive browser restarts, so returning users don't go
+# back through /login and the (deliberately slow) password hash check
+app.permanent_session_lifetime = timedelta(days=7)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 USERS_FILE = os.path.join(BASE_DIR, "users.json")
@@ -18,14 +36,132 @@ WASTE_FILE = os.path.join(BASE_DIR,'wastes.json')
 
 
 
+# ----------------------- JSON FILE CACHE -----------------------
+
+# path -> (st_mtime_ns, st_size, parsed data)
+_JSON_CACHE = {}
+# path -> number of saves made by this process
+_WRITE_COUNT = {}
+# Serialises load -> mutate -> save sequences. The cached documents are
+# shared between request threads, so two unguarded writers could append
+# to the same list and race each other's save. Reentrant because the
+# load_* helpers also take it for their one-time rebuilds.
+_WRITE_LOCK = threading.RLock()
+
+
+def _read_json_cached(path):
+    """
+    Parse a JSON file once per process and reuse the result until the
+    file's mtime or size changes on disk.
+
+    The returned object is shared with the cache, so callers that mutate
+    it must persist the change through _write_json_cached().
+    """
+    st = os.stat(path)
+    cached = _JSON_CACHE.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    # slurp the whole file and parse the buffer in one go; these files are
+    # small and json.load() would otherwise read them in many chunks
+    with open(path, "rb") as f:
+        buf = f.read()
+    data = orjson.loads(buf) if orjson is not None else json.loads(buf)
+    _JSON_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+    return data
+
+
+def _file_version(path):
+    """
+    Cache key that changes whenever path changes: its mtime and size for
+    edits made outside the app, plus our own save count, since two saves
+    can land within the filesystem's mtime resolution.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, _WRITE_COUNT.get(path, 0))
+
+
+def _write_json_cached(path, data):
+    """
+    Write data to path and refresh its cache entry with the new stat.
+
+    The document is encoded straight to bytes and written with a single
+    write() to a temp file, which then replaces the original so readers
+    never see a half-written file.
+    """
+    # indented for humans while developing (app.run(debug=True)), compact
+    # otherwise
+    if orjson is not None:
+        buf = orjson.dumps(data, option=orjson.OPT_INDENT_2 if app.debug else 0)
+    elif app.debug:
+        buf = json.dumps(data, indent=2).encode("utf-8")
+    else:
+        buf = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(buf)
+    os.replace(tmp_path, path)
+    st = os.stat(path)
+    _JSON_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+    _WRITE_COUNT[path] = _WRITE_COUNT.get(path, 0) + 1
+
+
+def _take_next_id(data, records):
+    """
+    Hand out the document's next auto-increment id and bump the stored
+    counter. Files written before "next_id" existed are seeded from the
+    records once.
+    """
+    next_id = data.get("next_id")
+    if next_id is None:
+        next_id = max([r["id"] for r in records], default=0) + 1
+    data["next_id"] = next_id + 1
+    return next_id
+
+
 # ----------------------- USER JSON DB -----------------------
 
+# (users document, email -> user, id -> user). The maps point at the same
+# dicts as the cached users.json and are rebuilt whenever a different
+# document is loaded or saved. Always replaced as a whole, never mutated,
+# so lock-free readers see either the old index or the new one.
+_USERS_INDEX = (None, {}, {})
+
+
+def _index_users(data):
+    """Build and publish a fresh index for data; caller holds _WRITE_LOCK."""
+    global _USERS_INDEX
+    by_email = {}
+    by_id = {}
+    for u in data["users"]:
+        # keep the first match, same as the old linear scan
+        by_email.setdefault(u["email"], u)
+        by_id.setdefault(u["id"], u)
+    _USERS_INDEX = (data, by_email, by_id)
+    return _USERS_INDEX
+
+
+def _users_index():
+    """The (data, by_email, by_id) index for the current users.json."""
+    data = load_users()
+    index = _USERS_INDEX
+    if index[0] is not data:
+        with _WRITE_LOCK:
+            # re-check: a save may have published an index meanwhile
+            index = _USERS_INDEX
+            if index[0] is not data:
+                index = _index_users(data)
+    return index
+
+
 def load_users():
     if not os.path.exists(USERS_FILE):
         return {"users": []}
     try:
-        with open(USERS_FILE, "r") as f:
-            data = json.load(f)
+        data = _read_json_cached(USERS_FILE)
         if "users" not in data:
             return {"users": []}
         return data
@@ -34,109 +170,188 @@ def load_users():
 
 
 def save_users(data):
-    with open(USERS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    with _WRITE_LOCK:
+        _write_json_cached(USERS_FILE, data)
+        _index_users(data)
 
 
 def add_user(email, password_hash, name):
-    data = load_users()
-    users = data["users"]
+    with _WRITE_LOCK:
+        data = load_users()
+        users = data["users"]
 
-    next_id = max([u["id"] for u in users], default=0) + 1
+        next_id = _take_next_id(data, users)
 
-    user = {
-        "id": next_id,
-        "email": email,
-        "password_hash": password_hash,
-        "name": name,
-        "user_type": "pending",
-        "created_at": datetime.utcnow().isoformat()
-    }
-    users.append(user)
-    save_users(data)
-    return user
+        user = {
+            "id": next_id,
+            "email": email,
+            "password_hash": password_hash,
+            "name": name,
+            "user_type": "pending",
+            "created_at": datetime.utcnow().isoformat()
+        }
+        users.append(user)
+        save_users(data)
+        return user
 
 
 def find_user_by_email(email):
-    data = load_users()
-    for u in data["users"]:
-        if u["email"] == email:
-            return u
-    return None
+    return _users_index()[1].get(email)
 
 
 def update_user_type(user_id, user_type):
-    data = load_users()
-    for u in data["users"]:
-        if u["id"] == user_id:
-            u["user_type"] = user_type
-            save_users(data)
-            return u
-    return None
+    with _WRITE_LOCK:
+        data, _, by_id = _users_index()
+        u = by_id.get(user_id)
+        if u is None:
+            return None
+        u["user_type"] = user_type
+        save_users(data)
+        return u
 
 
 # ----------------------- EMISSIONS JSON DB -----------------------
 
+# unit -> multiplier into kg; anything not listed is assumed to be kg
+_UNIT_KG = {
+    "tonne": 1000.0,
+    "tonnes": 1000.0,
+    "t": 1000.0,
+    "g": 1e-3,
+    "gram": 1e-3,
+    "grams": 1e-3,
+    "kg": 1.0,
+    "": 1.0,
+    None: 1.0,
+}
+
+_EMISSION_TYPES = ("co2", "no2", "ch4")
+
+
+def _to_kg(amount, unit):
+    # exact match first so the usual lowercase / missing units skip .lower()
+    factor = _UNIT_KG.get(unit)
+    if factor is None:
+        factor = _UNIT_KG.get(unit.lower(), 1.0)
+    return float(amount) * factor
+
+
+def _empty_totals():
+    return {etype: 0.0 for etype in _EMISSION_TYPES}
+
+
+def _scan_totals(emissions):
+    """
+    Sum every record into per-user kg totals in a single pass.
+
+    Returns {str(user_id): {"co2": kg, "no2": kg, "ch4": kg}} (string keys,
+    as stored in emissions.json); users without any co2/no2/ch4 records
+    are absent.
+    """
+    totals_by_user = {}
+    # bind the lookups used per record to locals
+    get_totals = totals_by_user.get
+    emission_types = _EMISSION_TYPES
+
+    for e in emissions:
+        etype = e.get("type")
+        if etype not in emission_types:
+            continue
+
+        uid = str(e["user_id"])
+        totals = get_totals(uid)
+        if totals is None:
+            totals = totals_by_user[uid] = _empty_totals()
+
+        amount_kg = e.get("amount_kg")
+        if amount_kg is None:
+            # records written before amount_kg was stored
+            amount = e.get("amount", 0.0)
+            if amount is None:  # a non-finite amount saved as null
+                continue
+            amount_kg = _to_kg(amount, e.get("unit"))
+        if not math.isfinite(amount_kg):
+            continue
+        totals[etype] += amount_kg
+
+    return totals_by_user
+
+
 def load_emissions():
+    """
+    Load emissions.json. Besides the raw "emissions" list the document
+    carries running per-user "totals", which add_emission keeps up to
+    date; files written before that existed get them rebuilt here once.
+    """
     if not os.path.exists(EMISSIONS_FILE):
-        return {"emissions": []}
-    try:
-        with open(EMISSIONS_FILE, "r") as f:
-            data = json.load(f)
-        return data
-    except Exception:
-        return {"emissions": []}
+        data = {"emissions": []}
+    else:
+        try:
+            data = _read_json_cached(EMISSIONS_FILE)
+        except Exception:
+            data = {"emissions": []}
+
+    if "totals" not in data:
+        # under the lock so a concurrent add_emission can't append between
+        # the scan and publishing its result; re-check once we hold it
+        with _WRITE_LOCK:
+            if "totals" not in data:
+                data["totals"] = _scan_totals(data["emissions"])
+    return data
 
 
 def save_emissions(data):
-    with open(EMISSIONS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    _write_json_cached(EMISSIONS_FILE, data)
 
 
 def add_emission(user_id, emission_type, amount, unit):
-    data = load_emissions()
-    emissions = data["emissions"]
-
-    next_id = max([e["id"] for e in emissions], default=0) + 1
-
-    record = {
-        "id": next_id,
-        "user_id": user_id,
-        "type": emission_type,
-        "amount": float(amount),
-        "unit": unit,
-        "created_at": datetime.utcnow().isoformat()
-    }
-    emissions.append(record)
-    save_emissions(data)
+    # NaN/inf would be written as null by orjson and poison the totals
+    amount = float(amount)
+    if not math.isfinite(amount):
+        raise ValueError("emission amount must be a finite number")
+
+    with _WRITE_LOCK:
+        data = load_emissions()
+        emissions = data["emissions"]
+
+        next_id = _take_next_id(data, emissions)
+
+        # amount/unit are kept as entered; amount_kg is what totals use
+        record = {
+            "id": next_id,
+            "user_id": user_id,
+            "type": emission_type,
+            "amount": amount,
+            "unit": unit,
+            "amount_kg": _to_kg(amount, unit),
+            "created_at": datetime.utcnow().isoformat()
+        }
+        emissions.append(record)
 
+        if emission_type in _EMISSION_TYPES:
+            totals = data["totals"].setdefault(str(user_id), _empty_totals())
+            totals[emission_type] += record["amount_kg"]
 
-def compute_totals_for_user(user_id):
-    data = load_emissions()
-    totals = {"co2": 0.0, "no2": 0.0, "ch4": 0.0}
+        save_emissions(data)
 
-    for e in data["emissions"]:
-        if e["user_id"] != user_id:
-            continue
-
-        etype = e.get("type")
-        if etype not in totals:
-            continue
 
-        amount = float(e.get("amount", 0.0))
-        unit = (e.get("unit") or "").lower()
+def compute_totals_for_user(user_id):
+    totals = load_emissions()["totals"].get(str(user_id))
+    return dict(totals) if totals else _empty_totals()
 
-        # normalise everything into kg
-        if unit in ("tonne", "tonnes", "t"):
-            amount_kg = amount * 1000.0
-        elif unit in ("g", "gram", "grams"):
-            amount_kg = amount / 1000.0
-        else:  # assume kg
-            amount_kg = amount
 
-        totals[etype] += amount_kg
+def compute_totals_for_all_users():
+    """
+    Same as compute_totals_for_user, but for every user at once.
 
-    return totals
+    Returns {user_id: {"co2": kg, "no2": kg, "ch4": kg}}; users without
+    any emission records are absent.
+    """
+    totals_by_user = load_emissions()["totals"]
+    # snapshot under the lock: add_emission may add a user's first entry
+    # to this shared dict while we iterate it
+    with _WRITE_LOCK:
+        return {int(uid): dict(totals) for uid, totals in totals_by_user.items()}
 
 
 
@@ -146,23 +361,13 @@ def load_market_data():
     """Load the big decarbonisation JSON for a single hospital."""
     if not os.path.exists(DATA_FILE):
         return None
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+    return _read_json_cached(DATA_FILE)
     
 def load_waste_data():
     """Load the big decarbonisation JSON for a single hospital."""
     if not os.path.exists(WASTE_FILE):
         return None
-    with open(WASTE_FILE, "r") as f:
-        return json.load(f)
-
-
-def _iter_items(data):
-    """Yield every 'item' dict from the nested levers structure."""
-    for lever in data.get("levers", {}).values():
-        for sub in lever.get("sub_levers", {}).values():
-            for item in sub.get("items", {}).values():
-                yield item
+    return _read_json_cached(WASTE_FILE)
 
 
 def build_leaderboards_from_data(data):
@@ -182,21 +387,70 @@ def build_leaderboards_from_data(data):
     if not data:
         return [], []
 
-    # ---------- Hospital aggregate ----------
     hospital_name = data.get("hospital_profile", {}).get("name", "Unknown Hospital")
+    return _leaderboards_from_levers(hospital_name, data.get("levers", {}).values())
+
 
+def build_leaderboards_from_file(path=DATA_FILE):
+    """
+    Same result as build_leaderboards_from_data() for the JSON file at path;
+    the entry point for data.json leaderboards in place of
+    build_leaderboards_from_data(load_market_data()).
+
+    With ijson installed the file is streamed one lever at a time, so a
+    large data.json is never held in memory (or in the JSON cache) as a
+    whole. Without it the file is loaded through the cache as usual.
+    """
+    if not os.path.exists(path):
+        return [], []
+    if ijson is None:
+        return build_leaderboards_from_data(_read_json_cached(path))
+
+    with open(path, "rb") as f:
+        # same `if not data` guard as build_leaderboards_from_data: an
+        # empty (or null) document has no leaderboards
+        top = [event for _, event, _ in islice(ijson.parse(f), 2)]
+        if top[:1] != ["start_map"] or top[1:] == ["end_map"]:
+            return [], []
+        f.seek(0)
+
+        # hospital_profile sits at the top of the file, so this stops early
+        hospital_name = next(ijson.items(f, "hospital_profile.name"), "Unknown Hospital")
+        f.seek(0)
+        levers = (lever for _, lever in ijson.kvitems(f, "levers", use_float=True))
+        return _leaderboards_from_levers(hospital_name, levers)
+
+
+def _leaderboards_from_levers(hospital_name, levers):
+    """Aggregate an iterable of lever dicts into the two leaderboards."""
     total_tonnes = 0.0
     total_cost_current = 0.0
     total_cost_alt = 0.0
+    # name -> [tonnes, cost_cur, cost_alt]
+    manufacturers = defaultdict(lambda: [0.0, 0.0, 0.0])
 
-    for item in _iter_items(data):
-        carbon = item.get("carbon", {})
-        costing = item.get("costing", {})
-
-        total_tonnes += float(carbon.get("annual_co2e_tonnes", 0.0))
-        total_cost_current += float(costing.get("annual_cost_rupees", 0.0))
-        total_cost_alt += float(costing.get("annual_alternative_cost_rupees", 0.0))
+    # one walk over the levers -> sub_levers -> items tree feeds both the
+    # hospital and manufacturer aggregates (plain loops, no per-item generator)
+    for lever in levers:
+        for sub in lever.get("sub_levers", {}).values():
+            for item in sub.get("items", {}).values():
+                carbon = item.get("carbon", {})
+                costing = item.get("costing", {})
+                tonnes = float(carbon.get("annual_co2e_tonnes", 0.0))
+                cost_cur = float(costing.get("annual_cost_rupees", 0.0))
+                cost_alt = float(costing.get("annual_alternative_cost_rupees", 0.0))
+
+                total_tonnes += tonnes
+                total_cost_current += cost_cur
+                total_cost_alt += cost_alt
+
+                for supplier in item.get("sourcing", {}).get("suppliers", []):
+                    m = manufacturers[supplier]
+                    m[0] += tonnes
+                    m[1] += cost_cur
+                    m[2] += cost_alt
 
+    # ---------- Hospital aggregate ----------
     # cost-based reduction %
     if total_cost_current > 0:
         reduction_pct = (total_cost_current - total_cost_alt) / total_cost_current * 100.0
@@ -215,43 +469,25 @@ def build_leaderboards_from_data(data):
     }]
 
     # ---------- Manufacturer aggregates ----------
-    manufacturers = {}  # name -> accumulator dict
-
-    for item in _iter_items(data):
-        carbon = item.get("carbon", {})
-        costing = item.get("costing", {})
-        tonnes = float(carbon.get("annual_co2e_tonnes", 0.0))
-        cost_cur = float(costing.get("annual_cost_rupees", 0.0))
-        cost_alt = float(costing.get("annual_alternative_cost_rupees", 0.0))
-
-        for supplier in item.get("sourcing", {}).get("suppliers", []):
-            m = manufacturers.setdefault(
-                supplier,
-                {"tonnes": 0.0, "cost_cur": 0.0, "cost_alt": 0.0},
-            )
-            m["tonnes"] += tonnes
-            m["cost_cur"] += cost_cur
-            m["cost_alt"] += cost_alt
-
     leaders_manufacturers = []
-    for name, agg in manufacturers.items():
-        if agg["cost_cur"] > 0:
-            red_pct = (agg["cost_cur"] - agg["cost_alt"]) / agg["cost_cur"] * 100.0
+    for name, (tonnes, cost_cur, cost_alt) in manufacturers.items():
+        if cost_cur > 0:
+            red_pct = (cost_cur - cost_alt) / cost_cur * 100.0
         else:
             red_pct = 0.0
         subsidy_pct = max(0.0, min(40.0, round(red_pct, 1)))
 
         leaders_manufacturers.append({
             "name": name,
-            "emissions_kg": agg["tonnes"] * 1000.0,
+            "emissions_kg": tonnes * 1000.0,
             "reduction_pct": red_pct,
             "subsidy_pct": subsidy_pct,
             "icon": "🏅",
         })
 
     # Sort: lowest emissions first
-    leaders_hospitals.sort(key=lambda x: x["emissions_kg"])
-    leaders_manufacturers.sort(key=lambda x: x["emissions_kg"])
+    leaders_hospitals.sort(key=itemgetter("emissions_kg"))
+    leaders_manufacturers.sort(key=itemgetter("emissions_kg"))
 
     return leaders_hospitals, leaders_manufacturers
 
@@ -271,6 +507,7 @@ def build_leaderboards_from_emissions():
     """
     users_data = load_users()
     all_users = users_data.get("users", [])
+    totals_by_user = compute_totals_for_all_users()
 
     hospital_entries = []
     manufacturer_entries = []
@@ -278,8 +515,10 @@ def build_leaderboards_from_emissions():
     for u in all_users:
         raw_type = (u.get("user_type") or "").lower().strip()
 
-        # compute totals first – if they have no emissions, skip
-        totals = compute_totals_for_user(u["id"])  # in kg
+        # look up totals first – if they have no emissions, skip
+        totals = totals_by_user.get(u["id"])  # in kg
+        if totals is None:
+            continue
         total_kg = float(totals.get("co2", 0.0)) + float(totals.get("no2", 0.0)) + float(totals.get("ch4", 0.0))
         if total_kg <= 0:
             continue
@@ -316,7 +555,7 @@ def build_leaderboards_from_emissions():
             e["subsidy_pct"] = round(max(0.0, min(40.0, rel)), 1)
 
         # sort best (lowest emissions) to worst
-        entries.sort(key=lambda x: x["emissions_kg"])
+        entries.sort(key=itemgetter("emissions_kg"))
         return entries
 
     hospital_entries = finalize_group(hospital_entries)
@@ -336,11 +575,13 @@ def login():
 
     # USER SUBMITS LOGIN FORM
     if request.method == "POST":
-        email = request.form.get("email").strip().lower()
-        password = request.form.get("password")
+        form = request.form
+        email = (form.get("email") or "").strip().lower()
+        password = form.get("password") or ""
 
         user = find_user_by_email(email)
         if user and check_password_hash(user["password_hash"], password):
+            session.permanent = True
             session["user_id"] = user["id"]
             session["user_email"] = user["email"]
             session["user_type"] = user["user_type"]
@@ -349,15 +590,20 @@ def login():
         flash("Invalid email or password.", "error")
         return redirect(url_for("login"))
 
+    # already signed in – no need to authenticate again
+    if "user_id" in session:
+        return redirect(url_for("dashboard"))
+
     return render_template("login.html", mode="auth")
 
 
 @app.route("/signup", methods=["POST"])
 def signup():
     # Safely read fields
-    email = (request.form.get("email") or "").strip().lower()
-    password = (request.form.get("password") or "")
-    name = (request.form.get("name") or "").strip()
+    form = request.form
+    email = (form.get("email") or "").strip().lower()
+    password = form.get("password") or ""
+    name = (form.get("name") or "").strip()
 
     # Basic validation – if anything is missing, bounce back
     if not email or not password or not name:
@@ -395,6 +641,7 @@ def set_identity():
 
     update_user_type(uid, user_type)
 
+    session.permanent = True
     session["user_id"] = uid
     session["user_email"] = session["pending_user_email"]
     session["user_type"] = user_type
@@ -405,18 +652,37 @@ def set_identity():
     return redirect(url_for("dashboard"))
 
 
+# (emissions version, {(user_id, user_email): rendered dashboard.html});
+# replaced as a whole when the version changes so old pages are dropped
+_DASHBOARD_CACHE = (None, {})
+
+
 @app.route("/dashboard")
 def dashboard():
+    global _DASHBOARD_CACHE
     if "user_id" not in session:
         return redirect(url_for("login"))
 
-    totals = compute_totals_for_user(session["user_id"])
+    # the page only depends on the user's totals and email, so reuse the
+    # last render until emissions.json changes
+    cache_key = (session["user_id"], session.get("user_email"))
+    version = _file_version(EMISSIONS_FILE)
+    cached_version, pages = _DASHBOARD_CACHE
+    if cached_version != version:
+        pages = {}
+        _DASHBOARD_CACHE = (version, pages)
 
-    return render_template(
-        "dashboard.html",
-        totals=totals,
-        user_email=session.get("user_email")
-    )
+    html = pages.get(cache_key)
+    if html is None:
+        totals = compute_totals_for_user(session["user_id"])
+
+        html = render_template(
+            "dashboard.html",
+            totals=totals,
+            user_email=session.get("user_email")
+        )
+        pages[cache_key] = html
+    return html
 
 
 @app.route("/add_emission", methods=["POST"])
@@ -424,24 +690,40 @@ def add_emission_route():
     if "user_id" not in session:
         return redirect(url_for("login"))
 
-    emission_type = request.form.get("emission_type")
-    amount = request.form.get("amount")
-    unit = request.form.get("unit")
+    form = request.form
+    emission_type = form.get("emission_type")
+    amount = form.get("amount")
+    unit = form.get("unit")
 
-    add_emission(session["user_id"], emission_type, amount, unit)
+    try:
+        add_emission(session["user_id"], emission_type, amount, unit)
+    except (TypeError, ValueError):
+        flash("Please enter a valid amount.", "error")
 
     return redirect(url_for("dashboard"))
 
 
+# (users version + emissions version key, rendered marketplace.html);
+# replaced as one tuple so a render can never be paired with another key
+_MARKETPLACE_CACHE = (None, None)
+
+
 @app.route("/marketplace")
 def marketplace():
-    leaders_hospitals, leaders_manufacturers = build_leaderboards_from_emissions()
-
-    return render_template(
-        "marketplace.html",
-        leaders_hospitals=leaders_hospitals,
-        leaders_manufacturers=leaders_manufacturers,
-    )
+    global _MARKETPLACE_CACHE
+    # the page is the same for every visitor, so both the leaderboard
+    # aggregation and the render are skipped until users/emissions change
+    key = (_file_version(USERS_FILE), _file_version(EMISSIONS_FILE))
+    cached_key, html = _MARKETPLACE_CACHE
+    if cached_key != key:
+        leaders_hospitals, leaders_manufacturers = build_leaderboards_from_emissions()
+        html = render_template(
+            "marketplace.html",
+            leaders_hospitals=leaders_hospitals,
+            leaders_manufacturers=leaders_manufacturers,
+        )
+        _MARKETPLACE_CACHE = (key, html)
+    return html
 
 
 @app.route("/waste_disposal")
@@ -499,7 +781,7 @@ def generate_response(text):
         return f"Request failed: {e}"
 
 
-@app.route("/logout")
+@app.route("/logout", methods=["GET", "POST"])
 def logout():
     session.clear()
     return redirect(url_for("home"))